@@ -24,3 +24,28 @@ class InvalidSQLType(ValueError):
     '''
     def __init__(self, values):
         super(InvalidSQLType, self).__init__(values)
+
+
+class InvalidAggregate(ValueError):
+    '''
+    Exception class that is raised to handle bad aggregate names passed.
+
+    @type aggs: <type 'str'>
+    @param aggs: A string of the aggregate names that were passed and
+                 resulted in the exeception being raised.
+    '''
+    def __init__(self, aggs):
+        super(InvalidAggregate, self).__init__(aggs)
+
+
+class UntrackedTable(ValueError):
+    '''
+    Exception class that is raised to handle reading the changes of a table
+    whose changes are not being tracked.
+
+    @type table: <type 'str'>
+    @param table: The name of the table that was passed and resulted in the
+                  exeception being raised.
+    '''
+    def __init__(self, table):
+        super(UntrackedTable, self).__init__(table)
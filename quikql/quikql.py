@@ -8,6 +8,8 @@ transactions or other database operations and queries.
 
 import os
 import sys
+import json
+import hashlib
 import sqlite3
 
 from .exceptions import *
@@ -22,6 +24,12 @@ INTEGER_PRIMARY_KEY = 'INTEGER PRIMARY KEY'
 
 SQLITE_TYPES = {'NULL', 'INTEGER', 'TEXT', 'REAL', 'BLOB', 'INTEGER PRIMARY KEY'}
 
+AGGREGATES = ('count', 'sum', 'min', 'max')
+AGGREGATES_TABLE = 'quikql_aggregates'
+CHANGES_TABLE = 'quikql_changes_{}'
+CHANGE_VERSIONS_TABLE = 'quikql_change_versions'
+CHANGES_REPLACED_TABLE = 'quikql_replaced_{}'
+
 ALL = Ellipsis
 
 
@@ -39,6 +47,7 @@ class Quikql(object):
         '''
         self._filename = filename
         self._conn = sqlite3.connect(self._filename)
+        self._aggregates = None
         self._execute('PRAGMA FOREIGN_KEYS=1')
 
     def _execute(self, command, items=None, many=False, valueiter=()):
@@ -58,17 +67,33 @@ class Quikql(object):
                      of values.
 
         @type valueiter: <type 'iter'>
-        @param valueiter: The iterable sequence of values to run with command.
+        @param valueiter: The iterable sequence of values to run with command,
+                          or the parameters to bind to a single command.
         '''
         with self._conn:
             cursor = self._conn.cursor()
             if many: 
                 cursor.executemany(command, valueiter)
             else:
-                cursor.execute(command)
+                cursor.execute(command, valueiter)
             fetch_values = self._fetch(cursor, items)
         return fetch_values
 
+    def _execute_all(self, commands):
+        '''
+        Private method to dispatch a sequence of commands in one transaction,
+        so that a failing command rolls back the commands before it.
+
+        @type commands: <type 'list'>
+        @param commands: A 'list' of 'tuple's of a string command and the
+                         parameters to bind to it.
+        '''
+        with self._conn:
+            cursor = self._conn.cursor()
+            cursor.execute('BEGIN')
+            for command, values in commands:
+                cursor.execute(command, values)
+
     def _fetch(self, cursor, items=None):
         '''
         Private method to retrieve values after a query is made.
@@ -203,13 +228,20 @@ class Quikql(object):
 
     def delete_table(self, table):
         '''
-        Method to delete a table.
+        Method to delete a table along with any aggregates materialized
+        for it and its change log.
 
         @type table: <type 'str'>
         @param table: The name of the table to delete.
         '''
         delete_table_command = 'DROP TABLE IF EXISTS {}'.format(table)
-        self._execute(delete_table_command)
+        commands = [(delete_table_command, ())]
+        self._aggregates = None
+        for key, materialized in self._materialized().items():
+            if key[0] == table:
+                commands += self._drop_aggregate_commands(materialized[0])
+        commands += self._untrack_changes_commands(table)
+        self._execute_all(commands)
     
     def delete_row(self, table, field_values):
         '''
@@ -332,6 +364,9 @@ class Quikql(object):
         '''
         if not isinstance(field, str):
             raise InvalidArg(type(field))
+        materialized = self._read_materialized(table, field, 'count')
+        if materialized is not None:
+            return materialized
         count_cmd = 'SELECT COUNT({}) FROM {}'.format(field, table)
         return self._execute(count_cmd) 
 
@@ -347,6 +382,9 @@ class Quikql(object):
         '''
         if not isinstance(field, str):
             raise InvalidArg(type(field))
+        materialized = self._read_materialized(table, field, 'min')
+        if materialized is not None:
+            return materialized
         minimum_cmd = 'SELECT MIN({}) FROM {}'.format(field, table)
         return self._execute(minimum_cmd)
 
@@ -362,6 +400,9 @@ class Quikql(object):
         '''
         if not isinstance(field, str):
             raise InvalidArg(type(field))
+        materialized = self._read_materialized(table, field, 'max')
+        if materialized is not None:
+            return materialized
         maximum_cmd = 'SELECT MAX({}) FROM {}'.format(field, table)
         return self._execute(maximum_cmd)
 
@@ -377,9 +418,626 @@ class Quikql(object):
         '''
         if not isinstance(field, str):
             raise InvalidArg(type(field))
+        materialized = self._read_materialized(table, field, 'sum')
+        if materialized is not None:
+            return materialized
         sum_cmd = 'SELECT SUM({}) FROM {}'.format(field, table)
         return self._execute(sum_cmd)
 
+    def materialize_aggregate(self, table, field, aggs=AGGREGATES, 
+                                                  group_by=()):
+        '''
+        Method to keep the aggregates of a field stored in a side table that
+        is kept current by triggers on the source table.  The `count`, `sum`,
+        `min` and `max` methods read from the side table instead of scanning
+        the source table once an ungrouped aggregate has been materialized.
+        Materializing the same table, field and grouping again replaces the
+        previous side table.
+
+        Rows that 'INSERT OR REPLACE' replaces on the primary key are taken
+        out of the aggregates.  Rows replaced through another unique
+        constraint or by 'UPDATE OR REPLACE' are not, call
+        `rebuild_aggregate` after such writes.
+
+        @type table: <type 'str'>
+        @param table: The table name to materialize the aggregates of.
+
+        @type field: <type 'str'>
+        @param field: The name of the field to aggregate.
+
+        @type aggs: <type 'str'> or <type 'tuple'>
+        @param aggs: One of or a 'tuple' of 'count', 'sum', 'min' and 'max'
+                     showing which aggregates to maintain.
+
+        @type group_by: <type 'str'> or <type 'tuple'>
+        @param group_by: Optional column name or 'tuple' of column names to
+                         keep a row of aggregates for each group of.
+        '''
+        if not isinstance(field, str):
+            raise InvalidArg(type(field))
+        aggs = self._column_names(aggs)
+        if not aggs or not set(AGGREGATES).issuperset(aggs):
+            raise InvalidAggregate(' '.join(map(str, aggs)))
+        group_by = self._column_names(group_by)
+        table_schema = self.get_schema(table)
+        schema = {column[1]:column[2] for column in table_schema}
+        for column in (field,) + group_by:
+            if column not in schema:
+                raise InvalidArg(column)
+        commands = []
+        materialized = self._aggregate_lookup(table, field, group_by)
+        if materialized is not None:
+            commands += self._drop_aggregate_commands(materialized[0])
+        name = 'quikql_agg_' + hashlib.sha1(json.dumps(
+                [table, field, group_by]).encode()).hexdigest()[:16]
+        group_columns = ''.join('{} {}, '.format(column, schema[column]) 
+                                for column in group_by)
+        agg_columns = ''.join(', agg_{}'.format(agg) for agg in aggs 
+                              if agg != 'count')
+        commands.append(('CREATE TABLE IF NOT EXISTS {} (name TEXT PRIMARY '
+                         'KEY, tbl TEXT, field TEXT, aggs TEXT, group_by TEXT, '
+                         'UNIQUE(tbl, field, group_by))'.format(
+                         AGGREGATES_TABLE), ()))
+        commands.append(('INSERT INTO {} VALUES(?, ?, ?, ?, ?)'.format(
+                         AGGREGATES_TABLE), (name, table, field, 
+                         ','.join(aggs), json.dumps(group_by))))
+        commands.append(('CREATE TABLE {} ({}agg_rows INTEGER, agg_count '
+                         'INTEGER{})'.format(name, group_columns, agg_columns), 
+                         ()))
+        commands.append(('CREATE TABLE {}_replaced ({})'.format(name, 
+                         ', '.join('c{}'.format(i) for i, _ in enumerate(
+                         self._replaced_columns(field, group_by)))), ()))
+        for trigger, event, body in self._aggregate_triggers(table, field, 
+                                    aggs, group_by, name, 
+                                    self._primary_key(table_schema)):
+            commands.append(('CREATE TRIGGER {}_{} {} ON {} BEGIN {} END'
+                             .format(name, trigger, event, table, body), ()))
+        commands += self._rebuild_aggregate_commands(table, field, aggs, 
+                                                     group_by, name)
+        self._aggregates = None
+        self._execute_all(commands)
+
+    def rebuild_aggregate(self, table, field, group_by=()):
+        '''
+        Method to recompute a materialized aggregate from the source table.
+
+        @type table: <type 'str'>
+        @param table: The table name the aggregate was materialized for.
+
+        @type field: <type 'str'>
+        @param field: The name of the field the aggregate was materialized for.
+
+        @type group_by: <type 'str'> or <type 'tuple'>
+        @param group_by: The grouping the aggregate was materialized with.
+        '''
+        group_by = self._column_names(group_by)
+        materialized = self._aggregate_lookup(table, field, group_by)
+        if materialized is None:
+            raise InvalidAggregate(' '.join((table, field) + group_by))
+        name, aggs = materialized
+        self._execute_all(self._rebuild_aggregate_commands(table, field, aggs,
+                                                           group_by, name))
+
+    def drop_aggregate(self, table, field, group_by=()):
+        '''
+        Method to remove a materialized aggregate along with its triggers.
+
+        @type table: <type 'str'>
+        @param table: The table name the aggregate was materialized for.
+
+        @type field: <type 'str'>
+        @param field: The name of the field the aggregate was materialized for.
+
+        @type group_by: <type 'str'> or <type 'tuple'>
+        @param group_by: The grouping the aggregate was materialized with.
+        '''
+        group_by = self._column_names(group_by)
+        materialized = self._aggregate_lookup(table, field, group_by)
+        if materialized is None:
+            return
+        self._aggregates = None
+        self._execute_all(self._drop_aggregate_commands(materialized[0]))
+
+    def get_aggregate(self, table, field, group_by=()):
+        '''
+        Method to return the rows of a materialized aggregate, each holding
+        the group column values followed by the row count, the count of
+        non-none fields and then the remaining aggregates in the order they
+        were materialized with.
+
+        @type table: <type 'str'>
+        @param table: The table name the aggregate was materialized for.
+
+        @type field: <type 'str'>
+        @param field: The name of the field the aggregate was materialized for.
+
+        @type group_by: <type 'str'> or <type 'tuple'>
+        @param group_by: The grouping the aggregate was materialized with.
+        '''
+        group_by = self._column_names(group_by)
+        materialized = self._aggregate_lookup(table, field, group_by)
+        if materialized is None:
+            raise InvalidAggregate(' '.join((table, field) + group_by))
+        return self._execute('SELECT * FROM {}'.format(materialized[0]), 
+                             items=ALL)
+
+    def _column_names(self, columns):
+        '''
+        Private method to normalize a column name argument into a 'tuple'.
+
+        @type columns: <type 'str'> or <type 'tuple'>
+        @param columns: A column name or a sequence of column names.
+        '''
+        if isinstance(columns, str):
+            return (columns,)
+        if not isinstance(columns, (tuple, list)):
+            raise InvalidArg(type(columns))
+        return tuple(columns)
+
+    def _materialized(self):
+        '''
+        Private method to return the registry of materialized aggregates,
+        mapping (table, field, group_by) to the side table name and the
+        aggregates it maintains.  The registry is cached until the database
+        schema changes, which every materialize and drop does.
+        '''
+        schema_version = self._execute('PRAGMA SCHEMA_VERSION')[0]
+        if self._aggregates is None or self._aggregates[0] != schema_version:
+            aggregates = {}
+            if self._table_exists(AGGREGATES_TABLE):
+                for name, table, field, aggs, group_by in self._execute(
+                    'SELECT * FROM {}'.format(AGGREGATES_TABLE), items=ALL):
+                    aggregates[(table, field, tuple(json.loads(group_by)))] = (
+                                            name, tuple(aggs.split(',')))
+            self._aggregates = (schema_version, aggregates)
+        return self._aggregates[1]
+
+    def _aggregate_lookup(self, table, field, group_by):
+        '''
+        Private method to look up the side table name and aggregates of a
+        materialized aggregate, returns None when it does not exist.
+
+        @type table: <type 'str'>
+        @param table: The source table name.
+
+        @type field: <type 'str'>
+        @param field: The aggregated field name.
+
+        @type group_by: <type 'tuple'>
+        @param group_by: The group column names.
+        '''
+        return self._materialized().get((table, field, group_by))
+
+    def _read_materialized(self, table, field, agg):
+        '''
+        Private method to read an ungrouped materialized aggregate, returns
+        None when the aggregate has not been materialized.
+
+        @type table: <type 'str'>
+        @param table: The table name to read the aggregate of.
+
+        @type field: <type 'str'>
+        @param field: The name of the field to read the aggregate of.
+
+        @type agg: <type 'str'>
+        @param agg: One of 'count', 'sum', 'min' or 'max'.
+        '''
+        materialized = self._aggregate_lookup(table, field, ())
+        if materialized is None or agg not in materialized[1]:
+            return None
+        return self._execute('SELECT agg_{} FROM {}'.format(agg, 
+                                                            materialized[0]))
+
+    def _drop_aggregate_commands(self, name):
+        '''
+        Private method to create the commands that remove a materialized
+        aggregate's side table, triggers and registry entry.
+
+        @type name: <type 'str'>
+        @param name: The side table name of the materialized aggregate.
+        '''
+        commands = [('DROP TRIGGER IF EXISTS {}_{}'.format(name, trigger), ())
+                    for trigger in ('replace', 'insert', 'update', 'delete')]
+        commands.append(('DROP TABLE IF EXISTS {}'.format(name), ()))
+        commands.append(('DROP TABLE IF EXISTS {}_replaced'.format(name), ()))
+        commands.append(('DELETE FROM {} WHERE name=?'.format(
+                         AGGREGATES_TABLE), (name,)))
+        return commands
+
+    def _rebuild_aggregate_commands(self, table, field, aggs, group_by, name):
+        '''
+        Private method to create the commands that recompute a side table.
+
+        @type table: <type 'str'>
+        @param table: The source table name.
+
+        @type field: <type 'str'>
+        @param field: The aggregated field name.
+
+        @type aggs: <type 'tuple'>
+        @param aggs: The aggregates to maintain.
+
+        @type group_by: <type 'tuple'>
+        @param group_by: The group column names.
+
+        @type name: <type 'str'>
+        @param name: The side table name.
+        '''
+        group_columns = ''.join(column + ', ' for column in group_by)
+        columns = ['agg_{}'.format(agg) for agg in aggs if agg != 'count']
+        values = ['{}({})'.format(agg.upper(), field) for agg in aggs
+                  if agg != 'count']
+        rebuild_cmd = 'INSERT INTO {}({}agg_rows, agg_count{}) '.format(
+                      name, group_columns, ''.join(', ' + c for c in columns))
+        rebuild_cmd += 'SELECT {}COUNT(*), COUNT({}){} FROM {}'.format(
+                       group_columns, field, ''.join(', ' + v for v in values),
+                       table)
+        if group_by:
+            rebuild_cmd += ' GROUP BY ' + ', '.join(group_by)
+        return [('DELETE FROM {}'.format(name), ()), (rebuild_cmd, ())]
+
+    def _aggregate_triggers(self, table, field, aggs, group_by, name, key):
+        '''
+        Private method to create the trigger names, events and bodies that
+        keep a materialized aggregate current.  A row that 'INSERT OR
+        REPLACE' replaces on the primary key is copied to a one row side
+        table before the insert and taken out of the aggregates after it.
+        Removing the extreme value of a 'min' or 'max', and changing a sum by
+        a value that is not an integer, are the only changes that query the
+        source table, which keeps the sums equal to a scan.
+
+        @type table: <type 'str'>
+        @param table: The source table name.
+
+        @type field: <type 'str'>
+        @param field: The aggregated field name.
+
+        @type aggs: <type 'tuple'>
+        @param aggs: The aggregates to maintain.
+
+        @type group_by: <type 'tuple'>
+        @param group_by: The group column names.
+
+        @type name: <type 'str'>
+        @param name: The side table name.
+
+        @type key: <type 'tuple'>
+        @param key: The primary key column names of the source table.
+        '''
+        replaced = name + '_replaced'
+        columns = self._replaced_columns(field, group_by)
+
+        def old(column):
+            return 'OLD.' + column
+
+        def new(column):
+            return 'NEW.' + column
+
+        def stashed(column):
+            return '(SELECT c{} FROM {})'.format(columns.index(column), 
+                                                 replaced)
+
+        def match(get):
+            return ' AND '.join('{} IS {}'.format(column, get(column)) 
+                                for column in group_by) or '1'
+
+        def scan(agg, get, exclude=None):
+            scan_cmd = '(SELECT {}({}) FROM {} WHERE {}'.format(agg, field, 
+                                                           table, match(get))
+            if exclude is not None:
+                scan_cmd += ' AND rowid IS NOT {}'.format(exclude)
+            return scan_cmd + ')'
+
+        def add(get):
+            value = get(field)
+            setters = ['agg_rows = agg_rows + 1',
+                       'agg_count = agg_count + ({} IS NOT NULL)'.format(value)]
+            if 'sum' in aggs:
+                setters.append("agg_sum = CASE WHEN {0} IS NULL THEN agg_sum "
+                               "WHEN typeof({0}) = 'integer' AND "
+                               "typeof(agg_sum) IN ('integer', 'null') THEN "
+                               "COALESCE(agg_sum, 0) + {0} ELSE {1} END"
+                               .format(value, scan('SUM', get)))
+            for agg, op in (('min', '<'), ('max', '>')):
+                if agg in aggs:
+                    setters.append('agg_{0} = CASE WHEN {1} IS NOT NULL AND '
+                                   '(agg_{0} IS NULL OR {1} {2} agg_{0}) '
+                                   'THEN {1} ELSE agg_{0} END'.format(
+                                   agg, value, op))
+            group_columns = ''.join(column + ', ' for column in group_by)
+            group_values = ''.join(get(column) + ', ' for column in group_by)
+            return ('INSERT INTO {0}({1}agg_rows, agg_count) SELECT {2}0, 0 '
+                    'WHERE NOT EXISTS (SELECT 1 FROM {0} WHERE {3}); '
+                    'UPDATE {0} SET {4} WHERE {3}; '.format(name, 
+                    group_columns, group_values, match(get), 
+                    ', '.join(setters)))
+
+        def remove(get, exclude=None, guard='1'):
+            value = get(field)
+            setters = ['agg_rows = agg_rows - 1',
+                       'agg_count = agg_count - ({} IS NOT NULL)'.format(value)]
+            if 'sum' in aggs:
+                setters.append("agg_sum = CASE WHEN {0} IS NULL THEN agg_sum "
+                               "WHEN agg_count = 1 THEN NULL "
+                               "WHEN typeof({0}) = 'integer' AND "
+                               "typeof(agg_sum) = 'integer' THEN "
+                               "agg_sum - {0} ELSE {1} END".format(value, 
+                               scan('SUM', get, exclude)))
+            for agg, op in (('min', '<='), ('max', '>=')):
+                if agg in aggs:
+                    setters.append('agg_{0} = CASE WHEN {1} IS NOT NULL AND '
+                                   '{1} {2} agg_{0} THEN {3} ELSE agg_{0} END'
+                                   .format(agg, value, op, 
+                                           scan(agg.upper(), get)))
+            body = 'UPDATE {} SET {} WHERE {} AND {}; '.format(name, 
+                                                   ', '.join(setters), 
+                                                   match(get), guard)
+            if group_by:
+                body += 'DELETE FROM {} WHERE {} AND agg_rows = 0; '.format(
+                                                           name, match(get))
+            return body
+
+        conflict = ' AND '.join('{0} = NEW.{0}'.format(column) 
+                                for column in key)
+        clear = 'DELETE FROM {}; '.format(replaced)
+        update_columns = ', '.join((field,) + tuple(c for c in group_by 
+                                                     if c != field))
+        return [('replace', 'BEFORE INSERT', clear + 
+                 'INSERT INTO {} SELECT {} FROM {} WHERE {}; '.format(
+                 replaced, ', '.join(columns), table, conflict)),
+                ('insert', 'AFTER INSERT', remove(stashed, 'NEW.rowid', 
+                 'EXISTS (SELECT 1 FROM {})'.format(replaced)) + clear + 
+                 add(new)),
+                ('delete', 'AFTER DELETE', remove(old) + clear),
+                ('update', 'AFTER UPDATE OF {}'.format(update_columns), 
+                 remove(old, 'NEW.rowid') + add(new))]
+
+    def _replaced_columns(self, field, group_by):
+        '''
+        Private method to list the columns a materialized aggregate copies
+        from a row that is about to be replaced.
+
+        @type field: <type 'str'>
+        @param field: The aggregated field name.
+
+        @type group_by: <type 'tuple'>
+        @param group_by: The group column names.
+        '''
+        return [field] + [column for column in group_by if column != field]
+
+    def _primary_key(self, schema):
+        '''
+        Private method to return the primary key column names of a table,
+        or the rowid for tables without one.
+
+        @type schema: <type 'list'>
+        @param schema: The table schema as returned by `get_schema`.
+        '''
+        return tuple(column[1] for column in sorted(schema, 
+                     key=lambda column: column[5]) if column[5]) or ('rowid',)
+
+    def track_changes(self, table, key=(), images=False):
+        '''
+        Method to record every insert, update and delete on a table in a
+        change log kept by triggers, so the changes can be read back with
+        `changes_since` instead of dumping the whole table.  Each entry has a
+        version that only ever increases for the table, also across
+        `untrack_changes` and `delete_table`.  Calling this again on a tracked
+        table keeps its change log and replaces the triggers.
+
+        A row that 'INSERT OR REPLACE' replaces on the primary key is
+        recorded as a delete before the insert of the new row.
+
+        @type table: <type 'str'>
+        @param table: The table name to track changes of.
+
+        @type key: <type 'str'> or <type 'tuple'>
+        @param key: Optional column name or 'tuple' of column names that
+                    identify a row, defaults to the primary key or the rowid.
+
+        @type images: <type 'bool'>
+        @param images: Flag for whether to also record the row before and
+                       after each change, with 'BLOB' values as hex strings.
+        '''
+        key = self._column_names(key)
+        schema = self.get_schema(table)
+        columns = [column[1] for column in schema]
+        for column in key:
+            if column not in columns and column != 'rowid':
+                raise InvalidArg(column)
+        primary_key = self._primary_key(schema)
+        key = key or primary_key
+        log = CHANGES_TABLE.format(table)
+        replaced = CHANGES_REPLACED_TABLE.format(table)
+
+        def value(ref, column):
+            return ("CASE WHEN typeof({0}.{1}) = 'blob' THEN hex({0}.{1}) "
+                    "ELSE {0}.{1} END".format(ref, column))
+
+        def row_key(ref):
+            return 'json_array({})'.format(', '.join(value(ref, c) 
+                                                     for c in key))
+
+        def image(ref):
+            if not images:
+                return 'NULL'
+            return 'json_object({})'.format(', '.join("'{}', {}".format(
+                                            c, value(ref, c)) for c in columns))
+
+        entry = "INSERT INTO " + log + " (op, key, old, new) "
+        entry += "SELECT '{}', {}, {}, {} WHERE {}; "
+        same_key = ' AND '.join('OLD.{0} IS NEW.{0}'.format(c) for c in key)
+        conflict = ' AND '.join('{0} = NEW.{0}'.format(c) for c in primary_key)
+        clear = 'DELETE FROM {}; '.format(replaced)
+        triggers = {'replace':('BEFORE INSERT', clear + 'INSERT INTO {} '
+                               'SELECT {}, {} FROM {} WHERE {}; '.format(
+                               replaced, row_key(table), image(table), table,
+                               conflict)),
+                    'insert':('AFTER INSERT', "INSERT INTO {} (op, key, old, "
+                              "new) SELECT 'DELETE', key, old, NULL FROM {}; "
+                              .format(log, replaced) + clear + entry.format(
+                              'INSERT', row_key('NEW'), 'NULL', image('NEW'), 
+                              1)),
+                    'delete':('AFTER DELETE', entry.format('DELETE', 
+                              row_key('OLD'), image('OLD'), 'NULL', 1) + 
+                              clear),
+                    'update':('AFTER UPDATE', entry.format('UPDATE', row_key('NEW'),
+                              image('OLD'), image('NEW'), same_key) + 
+                              entry.format('DELETE', row_key('OLD'),
+                              image('OLD'), 'NULL', 'NOT ' + same_key) + 
+                              entry.format('INSERT', row_key('NEW'), 
+                              'NULL', image('NEW'), 'NOT ' + same_key))}
+        commands = [('CREATE TABLE IF NOT EXISTS {} (tbl TEXT PRIMARY KEY, '
+                     'version INTEGER)'.format(CHANGE_VERSIONS_TABLE), ()),
+                    ('CREATE TABLE IF NOT EXISTS {} (version INTEGER PRIMARY '
+                     'KEY AUTOINCREMENT, op TEXT, key TEXT, old TEXT, '
+                     'new TEXT)'.format(log), ()),
+                    ('CREATE TABLE IF NOT EXISTS {} (key TEXT, old TEXT)'
+                     .format(replaced), ()),
+                    ('INSERT INTO sqlite_sequence (name, seq) SELECT ?, '
+                     'version FROM {} WHERE tbl=? AND NOT EXISTS (SELECT 1 '
+                     'FROM sqlite_sequence WHERE name=?)'.format(
+                     CHANGE_VERSIONS_TABLE), (log, table, log))]
+        for event in triggers:
+            commands.append(('DROP TRIGGER IF EXISTS {}_{}'.format(log, event),
+                             ()))
+            commands.append(('CREATE TRIGGER {}_{} {} ON {} BEGIN {} END'
+                             .format(log, event, triggers[event][0], table, 
+                                     triggers[event][1]), ()))
+        self._execute_all(commands)
+
+    def untrack_changes(self, table):
+        '''
+        Method to stop tracking changes of a table and drop its change log.
+        The latest version is kept, so tracking the table again continues
+        from it.
+
+        @type table: <type 'str'>
+        @param table: The table name to stop tracking changes of.
+        '''
+        self._execute_all(self._untrack_changes_commands(table))
+
+    def changes_since(self, table, version=0, size=1000):
+        '''
+        Method to stream the changes made to a tracked table after a version.
+        Each change is a 'tuple' of the version, the operation ('INSERT',
+        'UPDATE' or 'DELETE'), a 'tuple' of the key values and the row before
+        and after the change as a 'dict', or None when images are not kept.
+        An update that changes the key is recorded as a delete of the old key
+        followed by an insert of the new one.
+
+        @type table: <type 'str'>
+        @param table: The tracked table name to read changes of.
+
+        @type version: <type 'int'>
+        @param version: The last version already read, changes after it are
+                        returned.
+
+        @type size: <type 'int'>
+        @param size: Number of changes to read from the change log at a time.
+        '''
+        if not isinstance(size, int) or size < 1:
+            raise InvalidArg(size)
+        if not self._table_exists(CHANGES_TABLE.format(table)):
+            raise UntrackedTable(table)
+        return self._stream_changes(table, version, size)
+
+    def change_version(self, table):
+        '''
+        Method to return the latest version recorded for a table, which is
+        kept after the entries up to it are compacted or the table is
+        untracked.
+
+        @type table: <type 'str'>
+        @param table: The tracked table name.
+        '''
+        log = CHANGES_TABLE.format(table)
+        if self._table_exists(log):
+            version_cmd = 'SELECT seq FROM sqlite_sequence WHERE name=?'
+            version = self._execute(version_cmd, valueiter=(log,))
+        elif self._table_exists(CHANGE_VERSIONS_TABLE):
+            version_cmd = 'SELECT version FROM {} WHERE tbl=?'.format(
+                                                  CHANGE_VERSIONS_TABLE)
+            version = self._execute(version_cmd, valueiter=(table,))
+        else:
+            version = None
+        return version[0] if version is not None else 0
+
+    def compact_changes(self, table, version):
+        '''
+        Method to remove the changes up to and including a version from a
+        tracked table's change log once they have been consumed.
+
+        @type table: <type 'str'>
+        @param table: The tracked table name.
+
+        @type version: <type 'int'>
+        @param version: The last version that has been consumed.
+        '''
+        log = CHANGES_TABLE.format(table)
+        if not self._table_exists(log):
+            raise UntrackedTable(table)
+        compact_cmd = 'DELETE FROM {} WHERE version <= ?'.format(log)
+        self._execute(compact_cmd, valueiter=(version,))
+
+    def _stream_changes(self, table, version, size):
+        '''
+        Private method to page through a change log after a version.
+
+        @type table: <type 'str'>
+        @param table: The tracked table name to read changes of.
+
+        @type version: <type 'int'>
+        @param version: The last version already read.
+
+        @type size: <type 'int'>
+        @param size: Number of changes to read from the change log at a time.
+        '''
+        changes_cmd = 'SELECT * FROM {} WHERE version > ? ORDER BY version '
+        changes_cmd = changes_cmd.format(CHANGES_TABLE.format(table))
+        changes_cmd += 'LIMIT ?'
+        while True:
+            changes = self._execute(changes_cmd, items=ALL, 
+                                    valueiter=(version, size))
+            for version, op, key, old, new in changes:
+                yield (version, op, tuple(json.loads(key)),
+                       json.loads(old) if old is not None else None,
+                       json.loads(new) if new is not None else None)
+            if len(changes) < size:
+                break
+
+    def _untrack_changes_commands(self, table):
+        '''
+        Private method to create the commands that drop a change log and its
+        triggers while keeping its latest version.
+
+        @type table: <type 'str'>
+        @param table: The tracked table name.
+        '''
+        log = CHANGES_TABLE.format(table)
+        if not self._table_exists(log):
+            return []
+        commands = [('DROP TRIGGER IF EXISTS {}_{}'.format(log, event), ())
+                    for event in ('replace', 'insert', 'update', 'delete')]
+        commands.append(('DROP TABLE IF EXISTS {}'.format(
+                         CHANGES_REPLACED_TABLE.format(table)), ()))
+        commands.append(('INSERT OR REPLACE INTO {} SELECT ?, seq FROM '
+                         'sqlite_sequence WHERE name=?'.format(
+                         CHANGE_VERSIONS_TABLE), (table, log)))
+        commands.append(('DROP TABLE IF EXISTS {}'.format(log), ()))
+        return commands
+
+    def _table_exists(self, table):
+        '''
+        Private method to check whether a table exists in the database.
+
+        @type table: <type 'str'>
+        @param table: The table name to look for.
+        '''
+        exists_cmd = 'SELECT name FROM sqlite_master WHERE type="table" '
+        exists_cmd += 'AND name=?'
+        return self._execute(exists_cmd, valueiter=(table,)) is not None
+
     def dump_table(self, table, order=None):
         '''
         Method to return entire table contents.
@@ -407,9 +1065,11 @@ class Quikql(object):
 
     def get_tables(self):
         '''
-        Method to return all the tables in database object.
+        Method to return all the tables in database object, leaving out the
+        tables Quikql keeps internally.
         '''
-        table_cmd = 'SELECT name FROM sqlite_master WHERE type="table"'
+        table_cmd = 'SELECT name FROM sqlite_master WHERE type="table" '
+        table_cmd += 'AND name NOT GLOB "quikql_*" AND name NOT GLOB "sqlite_*"'
         return self._execute(table_cmd, items=ALL)
     
     def get_schema(self, table):
@@ -6,7 +6,7 @@ import json
 import unittest
 
 from quikql import *
-from sqlite3 import IntegrityError
+from sqlite3 import IntegrityError, connect
 
 
 class QuikqlTest(unittest.TestCase):
@@ -148,11 +148,254 @@ class QuikqlTest(unittest.TestCase):
         self.assertRaises(InvalidArg, self.testdb.sum, 'artists', ['field1', 
                                                                    'field2'])
 
+    def test_materialize_aggregate(self):
+        self.testdb.materialize_aggregate('artists', 'artist')
+        artist_count = len(self.json_data['artists'])
+        self.assertEqual(artist_count, self.testdb.count('artists', 'artist')[0])
+        self.testdb.insert_row('artists', {'artist':'zz top'})
+        self.assertEqual(artist_count + 1, 
+                         self.testdb.count('artists', 'artist')[0])
+        self.assertEqual('zz top', self.testdb.max('artists', 'artist')[0])
+        self.testdb.delete_row('artists', {'artist':'zz top'})
+        self.assertEqual(artist_count, self.testdb.count('artists', 'artist')[0])
+        self.assertNotEqual('zz top', self.testdb.max('artists', 'artist')[0])
+        self.assertEqual([], [table for table, in self.testdb.get_tables()
+                              if table.startswith('quikql_')])
+        self.testdb.drop_aggregate('artists', 'artist')
+
+    def test_materialize_aggregate_group_by(self):
+        self.testdb.materialize_aggregate('music', 'track', aggs=('count',),
+                                          group_by='artist')
+        aggregates = self.testdb.get_aggregate('music', 'track', 'artist')
+        for artist in self.json_data['artists']:
+            titles = len(self.json_data['artists'][artist]['titles'])
+            self.assertIn((artist, titles, titles), aggregates)
+        self.testdb.drop_aggregate('music', 'track', 'artist')
+        self.assertRaises(InvalidAggregate, self.testdb.get_aggregate,
+                          'music', 'track', 'artist')
+
+    def test_materialize_aggregate_update_row(self):
+        self.testdb.create_table(test_table, test_schema, pkey=('name',))
+        self.testdb.insert_rows(test_table, 
+                                {'name':'quikql', 'language':'py', 'loc':10},
+                                {'name':'cpython', 'language':'c', 'loc':90},
+                                {'name':'pypy', 'language':'py', 'loc':70})
+        self.testdb.materialize_aggregate(test_table, 'loc')
+        self.testdb.materialize_aggregate(test_table, 'loc', 
+                                          group_by='language')
+        self.testdb.update_row(test_table, {'loc':20}, {'name':'quikql'})
+        self.assertEqual(180, self.testdb.sum(test_table, 'loc')[0])
+        self.testdb.update_row(test_table, {'language':'c'}, {'name':'pypy'})
+        self.assertEqual([('c', 2, 2, 160, 70, 90), ('py', 1, 1, 20, 20, 20)],
+                         sorted(self.testdb.get_aggregate(test_table, 'loc', 
+                                                          'language')))
+        self.testdb.delete_table(test_table)
+
+    def test_materialize_aggregate_replace_row(self):
+        self.testdb.create_table(test_table, test_schema, pkey=('name',))
+        self.testdb.insert_row(test_table, {'name':'quikql', 'loc':10})
+        self.testdb.materialize_aggregate(test_table, 'loc')
+        self.testdb.insert_row(test_table, {'name':'quikql', 'loc':25})
+        self.assertEqual(1, self.testdb.count(test_table, 'loc')[0])
+        self.assertEqual(25, self.testdb.sum(test_table, 'loc')[0])
+        self.assertEqual(25, self.testdb.min(test_table, 'loc')[0])
+        other = connect('radio.db')
+        with other:
+            other.execute('INSERT OR REPLACE INTO {} (name, loc) '
+                          'VALUES ("quikql", 30)'.format(test_table))
+        other.close()
+        self.assertEqual(1, self.testdb.count(test_table, 'loc')[0])
+        self.assertEqual(30, self.testdb.sum(test_table, 'loc')[0])
+        self.testdb.delete_table(test_table)
+
+    def test_materialize_aggregate_delete_extreme(self):
+        self.testdb.create_table(test_table, test_schema, pkey=('name',))
+        self.testdb.insert_rows(test_table, 
+                                {'name':'quikql', 'language':'py', 'loc':10},
+                                {'name':'pypy', 'language':'py', 'loc':70},
+                                {'name':'cython', 'language':'py', 'loc':40})
+        self.testdb.materialize_aggregate(test_table, 'loc', 
+                                          aggs=('min', 'max'), 
+                                          group_by='language')
+        self.testdb.delete_row(test_table, {'name':'quikql'})
+        self.testdb.delete_row(test_table, {'name':'pypy'})
+        self.assertEqual([('py', 1, 1, 40, 40)], 
+                         self.testdb.get_aggregate(test_table, 'loc', 
+                                                   'language'))
+        self.testdb.delete_table(test_table)
+
+    def test_rebuild_aggregate(self):
+        self.testdb.create_table(test_table, test_schema, pkey=('name',))
+        self.testdb.insert_rows(test_table, {'name':'quikql', 'loc':10},
+                                {'name':'pypy', 'loc':20})
+        self.testdb.materialize_aggregate(test_table, 'loc')
+        # 'UPDATE OR REPLACE' is not taken out of the aggregates, which is
+        # what `rebuild_aggregate` is documented for.
+        other = connect('radio.db')
+        with other:
+            other.execute('UPDATE OR REPLACE {} SET name="quikql" '
+                          'WHERE name="pypy"'.format(test_table))
+        other.close()
+        self.testdb.rebuild_aggregate(test_table, 'loc')
+        self.assertEqual(1, self.testdb.count(test_table, 'loc')[0])
+        self.assertEqual(20, self.testdb.sum(test_table, 'loc')[0])
+        self.testdb.delete_table(test_table)
+        self.assertRaises(InvalidAggregate, self.testdb.rebuild_aggregate,
+                          test_table, 'loc')
+
+    def test_materialize_aggregate_real_sum(self):
+        self.testdb.create_table(test_table, {'name':TEXT, 'score':REAL})
+        self.testdb.materialize_aggregate(test_table, 'score', aggs='sum')
+        self.testdb.insert_rows(test_table, {'name':'a', 'score':0.1},
+                                {'name':'b', 'score':0.2}, 
+                                {'name':'c', 'score':0.3})
+        self.testdb.delete_row(test_table, {'name':'a'})
+        self.assertEqual((0.2 + 0.3,), self.testdb.sum(test_table, 'score'))
+        self.testdb.delete_table(test_table)
+
+    def test_materialize_aggregate_other_session(self):
+        other = Quikql('radio.db')
+        self.testdb.create_table(test_table, test_schema)
+        self.testdb.insert_rows(test_table, {'loc':1}, {'loc':5})
+        other.count(test_table, 'loc')
+        self.testdb.materialize_aggregate(test_table, 'loc')
+        other.delete_table(test_table)
+        self.testdb.create_table(test_table, test_schema)
+        self.testdb.insert_rows(test_table, {'loc':100})
+        self.assertEqual((1,), self.testdb.count(test_table, 'loc'))
+        self.assertEqual((100,), self.testdb.max(test_table, 'loc'))
+        self.testdb.materialize_aggregate(test_table, 'loc', aggs='max')
+        other.max(test_table, 'loc')
+        self.testdb.drop_aggregate(test_table, 'loc')
+        self.assertEqual((100,), other.max(test_table, 'loc'))
+        self.testdb.delete_table(test_table)
+
+    def test_materialize_aggregate_name_collision(self):
+        self.testdb.create_table('a_b', {'c':INTEGER})
+        self.testdb.create_table('a', {'b_c':INTEGER})
+        self.testdb.insert_rows('a_b', {'c':1}, {'c':9})
+        self.testdb.insert_rows('a', {'b_c':99})
+        self.testdb.materialize_aggregate('a_b', 'c')
+        self.testdb.materialize_aggregate('a', 'b_c')
+        self.assertEqual((2,), self.testdb.count('a_b', 'c'))
+        self.assertEqual((9,), self.testdb.max('a_b', 'c'))
+        self.assertEqual((99,), self.testdb.max('a', 'b_c'))
+        self.testdb.delete_table('a_b')
+        self.testdb.delete_table('a')
+
+    def test_materialize_aggregate_InvalidArg(self):
+        self.testdb.create_table(test_table, test_schema)
+        self.assertRaises(InvalidArg, self.testdb.materialize_aggregate,
+                          test_table, 'nope')
+        self.assertRaises(InvalidArg, self.testdb.materialize_aggregate,
+                          test_table, 'loc', group_by='nope')
+        self.testdb.insert_row(test_table, {'name':'quikql', 'loc':10})
+        self.assertEqual((1,), self.testdb.count(test_table, 'loc'))
+        self.testdb.delete_table(test_table)
+
+    def test_materialize_aggregate_InvalidAggregate(self):
+        self.assertRaises(InvalidAggregate, self.testdb.materialize_aggregate,
+                          'music', 'duration', aggs=('avg',))
+
     def test_retrieve_table_content(self):
         artists = [entry for entry in self.json_data['artists']]
         table_artists = [i[0] for i in self.testdb.dump_table('artists')]
         self.assertEqual(artists, table_artists)
 
+    def test_track_changes(self):
+        self.testdb.track_changes('artists', images=True)
+        self.testdb.insert_row('artists', {'artist':'Lifetones'})
+        self.testdb.delete_row('artists', {'artist':'Lifetones'})
+        changes = list(self.testdb.changes_since('artists'))
+        self.assertEqual([(1, 'INSERT', ('Lifetones',), None, 
+                           {'artist':'Lifetones'}),
+                          (2, 'DELETE', ('Lifetones',), 
+                           {'artist':'Lifetones'}, None)], changes)
+        self.testdb.compact_changes('artists', 1)
+        self.assertEqual([2], [change[0] for change in 
+                               self.testdb.changes_since('artists')])
+        self.assertEqual([], list(self.testdb.changes_since('artists', 2)))
+        self.assertEqual(2, self.testdb.change_version('artists'))
+        self.testdb.untrack_changes('artists')
+
+    def test_track_changes_rowid(self):
+        self.testdb.create_table(test_table, test_schema)
+        version = self.testdb.change_version(test_table)
+        self.testdb.track_changes(test_table)
+        self.testdb.insert_rows(test_table, {'name':'quikql'}, 
+                                {'name':'pypy'}, {'name':'cython'})
+        self.testdb.update_row(test_table, {'loc':10}, {'name':'pypy'})
+        changes = list(self.testdb.changes_since(test_table, version, size=2))
+        self.assertEqual([(version + 1, 'INSERT', (1,), None, None),
+                          (version + 2, 'INSERT', (2,), None, None),
+                          (version + 3, 'INSERT', (3,), None, None),
+                          (version + 4, 'UPDATE', (2,), None, None)], changes)
+        self.testdb.delete_table(test_table)
+
+    def test_track_changes_key_update(self):
+        self.testdb.track_changes('artists')
+        self.testdb.insert_row('artists', {'artist':'Lifetones'})
+        self.testdb.update_row('artists', {'artist':'Lifetone'}, 
+                               {'artist':'Lifetones'})
+        version = self.testdb.change_version('artists')
+        self.assertEqual([('DELETE', ('Lifetones',)), ('INSERT', ('Lifetone',))],
+                         [change[1:3] for change in 
+                          self.testdb.changes_since('artists', version - 2)])
+        self.testdb.delete_row('artists', {'artist':'Lifetone'})
+        self.testdb.untrack_changes('artists')
+
+    def test_track_changes_blob(self):
+        self.testdb.create_table(test_table, {'name':BLOB, 'logo':BLOB})
+        version = self.testdb.change_version(test_table)
+        self.testdb.track_changes(test_table, key='name', images=True)
+        self.testdb.insert_rows(test_table, {'name':b'\x01', 'logo':b'\xff'})
+        self.assertEqual([(version + 1, 'INSERT', ('01',), None, 
+                           {'name':'01', 'logo':'FF'})],
+                         list(self.testdb.changes_since(test_table, version)))
+        self.testdb.delete_table(test_table)
+
+    def test_track_changes_version(self):
+        self.testdb.create_table(test_table, test_schema)
+        version = self.testdb.change_version(test_table)
+        self.testdb.track_changes(test_table)
+        self.testdb.insert_rows(test_table, {'name':'quikql'}, {'name':'pypy'})
+        self.testdb.untrack_changes(test_table)
+        self.assertEqual(version + 2, self.testdb.change_version(test_table))
+        self.testdb.track_changes(test_table)
+        self.testdb.insert_rows(test_table, {'name':'cython'})
+        self.assertEqual([version + 3], [change[0] for change in 
+                         self.testdb.changes_since(test_table, version + 2)])
+        self.testdb.delete_table(test_table)
+        self.assertEqual(version + 3, self.testdb.change_version(test_table))
+
+    def test_track_changes_replace_row(self):
+        self.testdb.create_table(test_table, test_schema, pkey=('name',))
+        version = self.testdb.change_version(test_table)
+        self.testdb.track_changes(test_table)
+        self.testdb.insert_row(test_table, {'name':'quikql', 'loc':10})
+        other = connect('radio.db')
+        with other:
+            other.execute('INSERT OR REPLACE INTO {} (name, loc) '
+                          'VALUES ("quikql", 30)'.format(test_table))
+        other.close()
+        self.assertEqual([('INSERT', ('quikql',)), ('DELETE', ('quikql',)),
+                          ('INSERT', ('quikql',))],
+                         [change[1:3] for change in 
+                          self.testdb.changes_since(test_table, version)])
+        self.testdb.delete_table(test_table)
+
+    def test_changes_since_InvalidArg(self):
+        self.testdb.track_changes('music')
+        for size in (0, -1, '10'):
+            self.assertRaises(InvalidArg, self.testdb.changes_since, 
+                              'music', 0, size)
+        self.testdb.untrack_changes('music')
+
+    def test_changes_since_UntrackedTable(self):
+        self.assertRaises(UntrackedTable, self.testdb.changes_since, 'music')
+        self.assertRaises(UntrackedTable, self.testdb.compact_changes, 
+                          'music', 1)
+
     def test_update_row(self):
         update_row = {'artist':'deadmau5', 'track':'Fallen'}
         update_column = {'duration':2.31}